@@ -2,19 +2,27 @@
 # A professional, single-file Streamlit application to generate comprehensive, AI-powered QBR decks.
 # Version 9: Added a professional login page.
 
+# matplotlib is imported inside the function that uses it so the login page renders without paying
+# for it; Python caches the module after the first deck is built.
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pptx
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
+from pptx.oxml.ns import qn
+from pptx.shapes.shapetree import SlideShapes
+import copy
 import datetime
+import hashlib
+import io
 import os
+import random
+import re
+import threading
 import time
+from functools import lru_cache
 
 # --- 1. BACKEND LOGIC: ENHANCED DATA & PRESENTATION GENERATION ---
 
@@ -29,133 +37,313 @@ PALETTE = {
     "white": RGBColor(255, 255, 255)
 }
 
+# Fixed layout sizes as prebuilt EMU lengths (slide geometry is in inches); computed values still go through Inches().
+_IN = {v: Inches(v) for v in (0, 0.05, 0.4, 0.5, 1.5, 2, 2.5, 3, 4, 5, 8.5, 9, 10, 13, 15, 16)}
+# Same for the fixed font sizes and paragraph spacings, in points.
+_PT = {v: Pt(v) for v in (8, 10, 18, 24, 48)}
+
+# --- Slide Layout ---
+# (box width, gap) in inches for the centred column rows on the KPI, challenges and roadmap slides.
+COLUMN_LAYOUTS = {"kpi": (3.0, 0.8), "challenges": (6.5, 1.0), "roadmap": (6.0, 2.0)}
+
+@lru_cache(maxsize=None)
+def _column_lefts(n, box, gap, slide_w=16):
+    """Returns the left edges (as Inches) of n columns of width box, spaced by gap and centred on the slide."""
+    start = (slide_w - (n * box + (n - 1) * gap)) / 2
+    return tuple(Inches(start + i * (box + gap)) for i in range(n))
+
 def rgb_to_hex(rgb_color_obj):
     """Converts a python-pptx RGBColor object to a hex string for matplotlib."""
     r, g, b = rgb_color_obj; return f"#{r:02x}{g:02x}{b:02x}"
 
-def get_enhanced_mock_data(customer_name):
-    """Generates a rich, multi-faceted dataset for a comprehensive QBR."""
-    np.random.seed(hash(customer_name) % (2**32 - 1))
-    kpis = {
-        "Account Health": f"{np.random.randint(75, 98)}/100", "NPS Score": f"{np.random.randint(30, 65)}",
-        "Adoption Rate": f"{np.random.randint(60, 95)}%", "Active Users": f"{np.random.randint(150, 500)}",
-    }
-    commit_vs_actual = pd.DataFrame({
-        'Metric': ['Feature Delivery', 'Uptime SLA', 'Avg. Ticket Response'], 'Commitment': ['5 New Features', '99.9% Uptime', '< 8 Hours'],
-        'Actual': ['6 New Features', f"{99.9 + np.random.uniform(0, 0.09):.2f}%", f"{np.random.uniform(6, 7.9):.1f} Hours"], 'Status': ['Exceeded', 'Met', 'Met']
-    })
+# Hex twins of PALETTE for matplotlib, formatted once rather than on every chart draw.
+PALETTE_HEX = {name: rgb_to_hex(color) for name, color in PALETTE.items()}
+
+# (label, low, high, format) for each snapshot KPI, in slide order; bounds are inclusive randint ranges.
+KPI_SPECS = (
+    ("Account Health", 75, 97, "{}/100"), ("NPS Score", 30, 64, "{}"),
+    ("Adoption Rate", 60, 94, "{}%"), ("Active Users", 150, 499, "{}"),
+)
+
+# Month labels for the three-month revenue forecast (Oct-Dec 2025), formatted once.
+FORECAST_MONTHS = tuple(datetime.date(2025, month, 1).strftime('%b') for month in (10, 11, 12))
+
+@st.cache_data(show_spinner=False, max_entries=256)  # Keyed on (name, date): the output is seeded by the name.
+def get_enhanced_mock_data(customer_name, report_date):
+    """Generates a rich, multi-faceted dataset for a comprehensive QBR dated report_date."""
+    # A handful of scalar draws: the stdlib generator is several times cheaper here than a NumPy Generator.
+    # Seeded from a stable digest: str hash() is salted per process, so the same customer would differ across workers.
+    rng = random.Random(int.from_bytes(hashlib.blake2b(customer_name.encode(), digest_size=4).digest(), 'little'))
+    kpis = {label: fmt.format(rng.randint(lo, hi)) for label, lo, hi, fmt in KPI_SPECS}
+    uptime_delta, response_hours = rng.uniform(0, 0.09), rng.uniform(6, 7.9)
+    # Tables that are only rendered into the deck are plain (headers, rows) pairs; a DataFrame buys nothing here.
+    commit_vs_actual = (['Metric', 'Commitment', 'Actual', 'Status'], [
+        ['Feature Delivery', '5 New Features', '6 New Features', 'Exceeded'],
+        ['Uptime SLA', '99.9% Uptime', f"{99.9 + uptime_delta:.2f}%", 'Met'],
+        ['Avg. Ticket Response', '< 8 Hours', f"{response_hours:.1f} Hours", 'Met'],
+    ])
     challenges = ["Slower than anticipated onboarding for the new analytics module.", "Integration with legacy CRM required custom development.", "User adoption in the finance department is lagging."]
     learnings = ["Dedicated onboarding webinars significantly boost initial adoption.", "Pre-sales technical discovery for legacy systems is crucial.", "Targeted training and identifying team champions accelerate adoption."]
-    okrs = pd.DataFrame({
-        'Objective': ["Enhance Collaboration", "Improve Data-Driven Decisions"],
-        'Key Result': ["Increase shared dashboard usage by 20%", "Train 5 team leads on advanced reporting"], 'Status': ['Not Started', 'Not Started']
-    })
+    okrs = (['Objective', 'Key Result', 'Status'], [
+        ["Enhance Collaboration", "Increase shared dashboard usage by 20%", 'Not Started'],
+        ["Improve Data-Driven Decisions", "Train 5 team leads on advanced reporting", 'Not Started'],
+    ])
     roadmap = {"Next Quarter": ["AI-Powered Insights Engine", "Mobile App V2 Launch"], "Following Quarter": ["Advanced API Access", "Integration Marketplace"]}
-    revenue_forecast = pd.DataFrame({'Month': pd.to_datetime([f'2025-{i}-01' for i in range(10, 13)]), 'Forecasted Revenue ($K)': [50 + i*5 + np.random.randint(-5, 5) for i in range(3)]})
-    action_plan = pd.DataFrame({
-        'Action Item': ["Schedule marketing team onboarding", "Finalize BI tool integration specs"], 'Owner': ["John (CSM)", "Jane (Customer IT)"],
-        'Due Date': [(datetime.date.today() + datetime.timedelta(days=d)).strftime('%Y-%m-%d') for d in [14, 30]], 'Status': ['Not Started', 'Not Started']
-    })
-    return locals()
-
-def create_revenue_chart(revenue_df, output_path="revenue_chart.png"):
-    """Creates a visually improved bar chart for the revenue forecast."""
-    plt.style.use('seaborn-v0_8-whitegrid')
-    fig, ax = plt.subplots(figsize=(8, 4))
-    sns.barplot(x=revenue_df['Month'].dt.strftime('%b'), y='Forecasted Revenue ($K)', data=revenue_df, color=rgb_to_hex(PALETTE["blue"]), ax=ax)
-    ax.set_title('Next Quarter Revenue Forecast', fontsize=14, weight='bold', color=rgb_to_hex(PALETTE["navy"]))
+    revenue_forecast = {month: 50 + i * 5 + rng.randint(-5, 4) for i, month in enumerate(FORECAST_MONTHS)}
+    due_dates = [(report_date + datetime.timedelta(days=d)).isoformat() for d in [14, 30]]
+    action_plan = (['Action Item', 'Owner', 'Due Date', 'Status'], [
+        ["Schedule marketing team onboarding", "John (CSM)", due_dates[0], 'Not Started'],
+        ["Finalize BI tool integration specs", "Jane (Customer IT)", due_dates[1], 'Not Started'],
+    ])
+    return {
+        'customer_name': customer_name, 'kpis': kpis, 'commit_vs_actual': commit_vs_actual, 'challenges': challenges,
+        'learnings': learnings, 'okrs': okrs, 'roadmap': roadmap, 'revenue_forecast': revenue_forecast, 'action_plan': action_plan,
+        'report_month': report_date.strftime('%B %Y'),
+    }
+
+# One long-lived figure is redrawn for every chart instead of allocating (and leaking) a new one per deck.
+# Streamlit serves each session on its own thread, so access is serialized with a lock.
+_CHART_LOCK = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _chart_canvas():
+    """Creates the shared chart figure on first use, importing matplotlib only then.
+
+    Uses the object-oriented Figure API rather than pyplot: the figure never enters pyplot's global
+    registry and no GUI backend is ever selected, since savefig renders PNGs through Agg directly.
+    """
+    from matplotlib import style
+    from matplotlib.figure import Figure
+    style.use('seaborn-v0_8-whitegrid')  # Applied once; Axes.clear() picks the style back up from rcParams.
+    fig = Figure(figsize=(8, 4), dpi=120)
+    return fig, fig.subplots()
+
+def _draw_revenue_chart(ax, revenue):
+    """Redraws the revenue forecast bars (month label -> $K) onto an existing (cleared) Axes."""
+    ax.clear(); ax.set_axisbelow(True)
+    ax.bar(list(revenue), list(revenue.values()), color=PALETTE_HEX["blue"])
+    ax.set_title('Next Quarter Revenue Forecast', fontsize=14, weight='bold', color=PALETTE_HEX["navy"])
     ax.set_xlabel(''); ax.set_ylabel('Forecasted Revenue ($K)', fontsize=10)
-    ax.grid(axis='y', linestyle='--', alpha=0.7)
-    sns.despine(left=True, bottom=True)
-    plt.tight_layout(); plt.savefig(output_path, dpi=300, transparent=True)
-    return output_path
-
-def add_master_elements(slide, customer_name):
-    """Adds consistent footer and design elements to each slide."""
-    footer = slide.shapes.add_textbox(Inches(0.5), Inches(8.5), Inches(15), Inches(0.4))
+    ax.grid(axis='y', linestyle='--', alpha=0.7); ax.xaxis.grid(False)
+    for spine in ax.spines.values(): spine.set_visible(False)
+
+def create_revenue_chart(revenue):
+    """Creates a visually improved bar chart for the revenue forecast and returns it as an in-memory PNG."""
+    buf = io.BytesIO()
+    with _CHART_LOCK:
+        fig, ax = _chart_canvas()
+        _draw_revenue_chart(ax, revenue)
+        # zlib level 1: PNG encoding is most of savefig's cost, and the deck's ZIP deflates the image again anyway.
+        fig.tight_layout(); fig.savefig(buf, format='png', transparent=True, pil_kwargs={'compress_level': 1})
+    buf.seek(0); return buf
+
+def _warm_chart_stack():
+    """Imports matplotlib and builds the chart canvas (style sheet + font manager) ahead of the first deck."""
+    with _CHART_LOCK: _chart_canvas()
+
+@st.cache_resource(show_spinner=False)
+def _start_backend_warmup():
+    """Kicks off _warm_chart_stack on a daemon thread, once per server process."""
+    thread = threading.Thread(target=_warm_chart_stack, name="qbr-warmup", daemon=True); thread.start()
+    return thread
+
+@lru_cache(maxsize=1)
+def _template_bytes():
+    """Reads python-pptx's bundled default template once so each deck is built from memory."""
+    with open(os.path.join(os.path.dirname(pptx.__file__), "templates", "default.pptx"), "rb") as f: return f.read()
+
+def add_master_elements(layout, footer_text):
+    """Adds the footer and accent bar to a slide layout, so every slide built from it shows them.
+
+    The footer is the same on every slide of a deck, so drawing it once on the layout keeps the shapes
+    (and their XML) out of each individual slide.
+    """
+    shapes = SlideShapes(layout.shapes._spTree, layout)  # Layout shape trees have no add_* API of their own.
+    footer = shapes.add_textbox(_IN[0.5], _IN[8.5], _IN[15], _IN[0.4])
     p = footer.text_frame.paragraphs[0]
-    p.text = f"QBR for {customer_name}  |  {datetime.date.today().strftime('%B %Y')}"
-    p.font.size = Pt(10); p.font.color.rgb = PALETTE["gray"]
+    p.text = footer_text
+    p.font.size = _PT[10]; p.font.color.rgb = PALETTE["gray"]
     
-    accent = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(0), Inches(1.5), Inches(16), Inches(0.05))
+    accent = shapes.add_shape(MSO_SHAPE.RECTANGLE, _IN[0], _IN[1.5], _IN[16], _IN[0.05])
     accent.fill.solid(); accent.fill.fore_color.rgb = PALETTE["blue"]
     accent.line.fill.background()
 
-def add_table_to_slide(slide, df, x, y, cx, cy):
-    """Adds a professionally styled table to a slide with zebra striping."""
-    shape = slide.shapes.add_table(df.shape[0] + 1, df.shape[1], x, y, cx, cy)
+def add_table_to_slide(slide, headers, rows, x, y, cx, cy):
+    """Adds a professionally styled table (header names + row lists) to a slide with zebra striping."""
+    shape = slide.shapes.add_table(len(rows) + 1, len(headers), x, y, cx, cy)
     table = shape.table
-    for i in range(df.shape[1]): table.columns[i].width = int(cx / df.shape[1])
-    for i, col_name in enumerate(df.columns):
-        cell = table.cell(0, i); cell.text = col_name; cell.vertical_anchor = MSO_ANCHOR.MIDDLE
-        p = cell.text_frame.paragraphs[0]; p.font.bold = True; p.font.color.rgb = PALETTE["white"]
-        cell.fill.solid(); cell.fill.fore_color.rgb = PALETTE["navy"]
-    for i, row in df.iterrows():
-        for j, value in enumerate(row):
-            cell = table.cell(i + 1, j); cell.text = str(value); cell.vertical_anchor = MSO_ANCHOR.MIDDLE
+    # Equal column widths go straight onto the a:gridCol elements, and the frame is resized once; the column
+    # width setter would re-sum every column and resize the frame on each assignment.
+    col_w = int(cx / len(headers))
+    for grid_col in table._tbl.tblGrid.gridCol_lst: grid_col.w = col_w
+    shape.width = col_w * len(headers)
+    middle, white, navy, stripe = MSO_ANCHOR.MIDDLE, PALETTE["white"], PALETTE["navy"], PALETTE["light_gray"]
+    # The first header cell is styled through the API; the other header cells are clones of its XML with the text swapped.
+    header_tcs = table._tbl.tr_lst[0].tc_lst
+    cell = table.cell(0, 0); cell.text = headers[0]; cell.vertical_anchor = middle
+    p = cell.text_frame.paragraphs[0]; p.font.bold = True; p.font.color.rgb = white
+    cell.fill.solid(); cell.fill.fore_color.rgb = navy
+    for tc, col_name in zip(header_tcs[1:], headers[1:]):
+        for child in list(tc): tc.remove(child)
+        for child in header_tcs[0]: tc.append(copy.deepcopy(child))
+        tc.txBody.p_lst[0].r_lst[0].text = col_name
+    # Body cells are written straight into the cell XML: each row's a:tc list is fetched once (rather than
+    # resolving table.cell(r, c) per cell), one run is appended to each cell's empty paragraph, and one
+    # stripe fill is cloned across the striped rows.
+    stripe_fill = None; body_trs = table._tbl.tr_lst[1:]
+    for i, (tr, row) in enumerate(zip(body_trs, rows)):
+        for j, (tc, value) in enumerate(zip(tr.tc_lst, row)):
+            tc.txBody.p_lst[0].add_r().text = str(value); tc.anchor = middle
             if i % 2 == 0: # Zebra striping for readability
-                cell.fill.solid(); cell.fill.fore_color.rgb = PALETTE["light_gray"]
+                if stripe_fill is None:
+                    cell = table.cell(i + 1, j); cell.fill.solid(); cell.fill.fore_color.rgb = stripe
+                    stripe_fill = tc.tcPr.find(qn('a:solidFill'))
+                else:
+                    tc.tcPr.append(copy.deepcopy(stripe_fill))
+
+def add_styled_paragraph(text_frame, text, size=None, bold=None, alignment=None, space_after=None):
+    """Appends a paragraph to a text frame, applying only the formatting that was passed in."""
+    p = text_frame.add_paragraph(); p.text = text
+    if bold is not None: p.font.bold = bold
+    if size is not None: p.font.size = size
+    if alignment is not None: p.alignment = alignment
+    if space_after is not None: p.space_after = space_after
+    return p
+
+def add_bullet_paragraphs(text_frame, items, space_after, prefix=""):
+    """Appends one spaced paragraph per item; the first is built through the API and its XML cloned for the rest."""
+    items = iter(items); first = next(items, None)
+    if first is None: return
+    p = text_frame.add_paragraph(); p.text = f"{prefix}{first}"; p.space_after = space_after
+    txBody, template = text_frame._txBody, p._p
+    for item in items:
+        clone = copy.deepcopy(template); clone.r_lst[0].text = f"{prefix}{item}"; txBody.append(clone)
 
-def create_professional_qbr_deck(data):
-    """Builds the final, professionally styled PowerPoint presentation."""
-    prs = Presentation(); prs.slide_width = Inches(16); prs.slide_height = Inches(9)
+def create_professional_qbr_deck(data, progress_cb=None):
+    """Builds the final, professionally styled PowerPoint presentation.
+
+    progress_cb, if given, is called as progress_cb(percent, text) as each slide is added.
+    """
+    prs = Presentation(io.BytesIO(_template_bytes())); prs.slide_width = _IN[16]; prs.slide_height = _IN[9]
+    title_layout, content_layout = prs.slide_layouts[0], prs.slide_layouts[1]
+    total_slides = 10
+    add_master_elements(content_layout, f"QBR for {data['customer_name']}  |  {data['report_month']}")
+    def report(title_text):
+        if progress_cb: progress_cb(25 + 70 * len(prs.slides) // total_slides, f"Building '{title_text}'...")
     def add_title_slide(title_text, subtitle_text):
-        slide = prs.slides.add_slide(prs.slide_layouts[0])
+        report(title_text); slide = prs.slides.add_slide(title_layout)
         slide.shapes.title.text = title_text; slide.placeholders[1].text = subtitle_text
         return slide
     def add_content_slide(title_text):
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = title_text; add_master_elements(slide, data['customer_name'])
+        report(title_text); slide = prs.slides.add_slide(content_layout)
+        slide.shapes.title.text = title_text
         return slide, slide.placeholders[1]
 
     add_title_slide(f"Quarterly Business Review: {data['customer_name']}", f"Q3 2025 Report")
     slide, content_placeholder = add_content_slide("Agenda"); content = content_placeholder.text_frame; content.clear()
     topics = ["Quarterly Snapshot", "Commitment Review", "Challenges & Learnings", "Next Quarter OKRs", "Product Roadmap", "Commercial Outlook", "Action Plan"]
-    for topic in topics: p = content.add_paragraph(); p.text = topic; p.level = 0; p.space_after = Pt(18)
+    add_bullet_paragraphs(content, topics, _PT[18])
 
     slide, _ = add_content_slide("Quarterly Snapshot: Key Metrics")
-    num_kpis = len(data['kpis']); box_width = 3.0; gap = 0.8; total_width = num_kpis * box_width + (num_kpis - 1) * gap
-    start_x = (16 - total_width) / 2
-    for i, (key, value) in enumerate(data['kpis'].items()):
-        left = Inches(start_x + i * (box_width + gap))
-        txBox = slide.shapes.add_textbox(left, Inches(2.5), Inches(box_width), Inches(2)); tf = txBox.text_frame
-        p_val = tf.add_paragraph(); p_val.text = str(value); p_val.font.bold = True; p_val.font.size = Pt(48); p_val.alignment = PP_ALIGN.CENTER
-        p_key = tf.add_paragraph(); p_key.text = key; p_key.font.size = Pt(18); p_key.alignment = PP_ALIGN.CENTER
-
-    slide, _ = add_content_slide("Commitment Review: Promises vs. Reality"); add_table_to_slide(slide, data['commit_vs_actual'], Inches(1.5), Inches(2.5), Inches(13), Inches(4))
+    box_width, gap = COLUMN_LAYOUTS["kpi"]; kpi_lefts = _column_lefts(len(data['kpis']), box_width, gap)
+    kpi_top, kpi_w, kpi_h, value_size, key_size, center = _IN[2.5], Inches(box_width), _IN[2], _PT[48], _PT[18], PP_ALIGN.CENTER
+    for left, (key, value) in zip(kpi_lefts, data['kpis'].items()):
+        tf = slide.shapes.add_textbox(left, kpi_top, kpi_w, kpi_h).text_frame
+        add_styled_paragraph(tf, str(value), size=value_size, bold=True, alignment=center)
+        add_styled_paragraph(tf, key, size=key_size, alignment=center)
+
+    slide, _ = add_content_slide("Commitment Review: Promises vs. Reality"); add_table_to_slide(slide, *data['commit_vs_actual'], _IN[1.5], _IN[2.5], _IN[13], _IN[4])
     
     slide, _ = add_content_slide("Challenges & Key Learnings")
-    box_w, gap_cl = 6.5, 1.0; left1 = (16 - (2 * box_w + gap_cl)) / 2; left2 = left1 + box_w + gap_cl
-    txBox1 = slide.shapes.add_textbox(Inches(left1), Inches(2.5), Inches(box_w), Inches(5)); tf1 = txBox1.text_frame
-    tf1.text = "Challenges Faced"; tf1.paragraphs[0].font.bold = True; tf1.paragraphs[0].font.size = Pt(24)
-    for item in data['challenges']: p = tf1.add_paragraph(); p.text = f"• {item}"; p.space_after = Pt(8)
-    txBox2 = slide.shapes.add_textbox(Inches(left2), Inches(2.5), Inches(box_w), Inches(5)); tf2 = txBox2.text_frame
-    tf2.text = "Key Lessons Learned"; tf2.paragraphs[0].font.bold = True; tf2.paragraphs[0].font.size = Pt(24)
-    for item in data['learnings']: p = tf2.add_paragraph(); p.text = f"• {item}"; p.space_after = Pt(8)
-
-    slide, _ = add_content_slide("Objectives for Next Quarter (OKRs)"); add_table_to_slide(slide, data['okrs'], Inches(1.5), Inches(2.5), Inches(13), Inches(3))
+    box_w_c, gap_c = COLUMN_LAYOUTS["challenges"]; (left1, left2), box_w = _column_lefts(2, box_w_c, gap_c), Inches(box_w_c)
+    txBox1 = slide.shapes.add_textbox(left1, _IN[2.5], box_w, _IN[5]); tf1 = txBox1.text_frame
+    tf1.text = "Challenges Faced"; tf1.paragraphs[0].font.bold = True; tf1.paragraphs[0].font.size = _PT[24]
+    add_bullet_paragraphs(tf1, data['challenges'], _PT[8], prefix="• ")
+    txBox2 = slide.shapes.add_textbox(left2, _IN[2.5], box_w, _IN[5]); tf2 = txBox2.text_frame
+    tf2.text = "Key Lessons Learned"; tf2.paragraphs[0].font.bold = True; tf2.paragraphs[0].font.size = _PT[24]
+    add_bullet_paragraphs(tf2, data['learnings'], _PT[8], prefix="• ")
+
+    slide, _ = add_content_slide("Objectives for Next Quarter (OKRs)"); add_table_to_slide(slide, *data['okrs'], _IN[1.5], _IN[2.5], _IN[13], _IN[3])
     
     slide, _ = add_content_slide("Strategic Growth & Product Roadmap")
-    num_r, box_w_r, gap_r = len(data['roadmap']), 6.0, 2.0; total_w_r = num_r * box_w_r + (num_r - 1) * gap_r
-    start_x_r = (16 - total_w_r) / 2
-    for i, (quarter, features) in enumerate(data['roadmap'].items()):
-        left = Inches(start_x_r + i * (box_w_r + gap_r))
-        txBox = slide.shapes.add_textbox(left, Inches(2.5), Inches(box_w_r), Inches(5)); tf = txBox.text_frame
-        p_qtr = tf.add_paragraph(); p_qtr.text = quarter; p_qtr.font.bold = True; p_qtr.font.size = Pt(24)
-        for feature in features: p_feat = tf.add_paragraph(); p_feat.text = f"• {feature}"; p_feat.space_after = Pt(8)
-
-    slide, _ = add_content_slide("Commercial Outlook: Revenue Forecast"); chart_path = create_revenue_chart(data['revenue_forecast'])
-    slide.shapes.add_picture(chart_path, Inches(3), Inches(2.0), width=Inches(10)); os.remove(chart_path)
+    box_w_r, gap_r = COLUMN_LAYOUTS["roadmap"]; roadmap_lefts = _column_lefts(len(data['roadmap']), box_w_r, gap_r)
+    col_top, col_w, col_h, heading_size, bullet_gap = _IN[2.5], Inches(box_w_r), _IN[5], _PT[24], _PT[8]
+    for left, (quarter, features) in zip(roadmap_lefts, data['roadmap'].items()):
+        tf = slide.shapes.add_textbox(left, col_top, col_w, col_h).text_frame
+        add_styled_paragraph(tf, quarter, size=heading_size, bold=True)
+        add_bullet_paragraphs(tf, features, bullet_gap, prefix="• ")
+
+    slide, _ = add_content_slide("Commercial Outlook: Revenue Forecast"); chart_png = create_revenue_chart(data['revenue_forecast'])
+    slide.shapes.add_picture(chart_png, _IN[3], _IN[2], width=_IN[10])
     
-    slide, _ = add_content_slide("Joint Action Plan & Owners"); add_table_to_slide(slide, data['action_plan'], Inches(1.5), Inches(2.5), Inches(13), Inches(3))
+    slide, _ = add_content_slide("Joint Action Plan & Owners"); add_table_to_slide(slide, *data['action_plan'], _IN[1.5], _IN[2.5], _IN[13], _IN[3])
     
     add_title_slide("Thank You", "Q&A and Discussion")
-    output_filename = f"QBR_{data['customer_name'].replace(' ', '_')}_{datetime.date.today()}.pptx"; prs.save(output_filename); return output_filename
+    buf = io.BytesIO(); prs.save(buf); return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _build_deck_bytes(customer_name, report_date, _on_build=None):
+    """Runs the data + deck pipeline and returns the .pptx bytes, cached per (customer, date).
+
+    Must not call st.* elements (e.g. a progress bar created by the caller): Streamlit replays those on a
+    cache hit, and an element created outside this function no longer exists then. _on_build (not part of
+    the cache key) is a plain callable invoked only when the deck is actually built, i.e. on a cache miss.
+    """
+    if _on_build: _on_build()
+    return create_professional_qbr_deck(get_enhanced_mock_data(customer_name, report_date))
+
+_SLUG_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+def deck_filename(customer_name, report_date):
+    """Builds a filesystem/header-safe .pptx download name; the raw customer name is kept for display only."""
+    slug = _SLUG_RE.sub('_', customer_name).strip('_')[:64] or "customer"
+    return f"QBR_{slug}_{report_date.isoformat()}.pptx"
 
 # --- 2. FRONTEND UI: MAIN APPLICATION & LOGIN PAGE ---
 
+# Static markup is built once at import and emitted with a single st.markdown call per rerun.
+_CSS = """
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
+    body { font-family: 'Inter', sans-serif; }
+    .stApp { background: #f0f2f6; }
+    .main-container { padding: 2rem; }
+    .header { text-align: center; margin-bottom: 2rem; }
+    .header h1 {
+        font-size: 3rem; font-weight: 700; color: #0f203e;
+        background: -webkit-linear-gradient(45deg, #007bff, #0f203e);
+        -webkit-background-clip: text; -webkit-text-fill-color: transparent;
+    }
+    .header p { font-size: 1.2rem; color: #555; }
+    .card {
+        background: white; border-radius: 15px; padding: 25px;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.07); transition: all 0.3s ease;
+    }
+    .card:hover { transform: translateY(-5px); box-shadow: 0 15px 30px rgba(0,0,0,0.1); }
+    .login-card { padding: 35px; }
+    .stButton>button {
+        background-image: linear-gradient(to right, #007bff 0%, #0056b3 100%);
+        color: white; border-radius: 10px; transition: 0.5s; background-size: 200% auto;
+        font-weight: 600; border: none; height: 3em; width: 100%;
+    }
+    .stButton>button:hover { background-position: right center; }
+    .stDownloadButton>button { background-image: linear-gradient(to right, #28a745, #218838); }
+    .feature-card { text-align: center; padding: 1.5rem; }
+    .feature-card h3 { color: #0f203e; font-weight: 600; }
+    .feature-card .icon { font-size: 3rem; margin-bottom: 1rem; color: #007bff; }
+</style>
+"""
+
+# One markup string per "How It Works" card; each is rendered into its own st.columns slot.
+_FEATURE_CARDS = (
+    "<div class='feature-card'><div class='icon'>📊</div><h3>Data Synthesis</h3><p>Aggregates key metrics from all your sources.</p></div>",
+    "<div class='feature-card'><div class='icon'>🤖</div><h3>AI Narration</h3><p>Generates summaries and actionable insights.</p></div>",
+    "<div class='feature-card'><div class='icon'>🎨</div><h3>Design Automation</h3><p>Builds a professionally designed presentation.</p></div>",
+)
+
 def main_app():
     """This function contains the main QBR generator application UI."""
+    _start_backend_warmup()  # Logged-in users will likely generate a deck; load the heavy libraries while they type.
     st.markdown("<div class='header'><h1>AI QBR Deck Generator</h1><p>Instantly create stunning, data-driven presentations that impress.</p></div>", unsafe_allow_html=True)
     
     col1, col2 = st.columns([1, 1.5])
@@ -168,19 +356,19 @@ def main_app():
                 if customer_name:
                     with st.spinner('Analyzing data and building your deck...'):
                         progress_bar = st.progress(0, text="Initializing...")
-                        enhanced_data = get_enhanced_mock_data(customer_name)
-                        time.sleep(1); progress_bar.progress(25, text="Generating Insights...")
-                        time.sleep(1); progress_bar.progress(50, text="Creating Visualizations...")
-                        time.sleep(1); progress_bar.progress(75, text="Assembling Deck...")
-                        final_deck_path = create_professional_qbr_deck(enhanced_data)
+                        report_date = datetime.date.today()  # Read once: the deck contents and file name share it.
+                        progress_bar.progress(25, text="Generating Insights...")  # Progress is driven out here, never inside the cache.
+                        started, built = time.perf_counter(), []  # Times the cached lookup plus any build.
+                        deck_bytes = _build_deck_bytes(customer_name, report_date, _on_build=lambda: built.append(True))
+                        elapsed = time.perf_counter() - started
                         progress_bar.progress(100, text="Done!")
                         st.success(f"🎉 Your QBR deck is ready!")
-                        with open(final_deck_path, "rb") as file:
-                            st.download_button(
-                                label="⬇️ Download Presentation", data=file, file_name=final_deck_path,
-                                mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                            )
-                        os.remove(final_deck_path)
+                        st.caption(f"Deck built in {elapsed:.2f}s" if built else f"Served from cache in {elapsed:.3f}s")
+                        st.download_button(
+                            label="⬇️ Download Presentation", data=deck_bytes,
+                            file_name=deck_filename(customer_name, report_date),
+                            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+                        )
                 else:
                     st.warning("Please enter a customer name.")
             st.markdown("</div>", unsafe_allow_html=True)
@@ -189,13 +377,8 @@ def main_app():
         with st.container():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.subheader("How It Works")
-            c1, c2, c3 = st.columns(3)
-            with c1:
-                st.markdown("<div class='feature-card'><div class='icon'>📊</div><h3>Data Synthesis</h3><p>Aggregates key metrics from all your sources.</p></div>", unsafe_allow_html=True)
-            with c2:
-                st.markdown("<div class='feature-card'><div class='icon'>🤖</div><h3>AI Narration</h3><p>Generates summaries and actionable insights.</p></div>", unsafe_allow_html=True)
-            with c3:
-                st.markdown("<div class='feature-card'><div class='icon'>🎨</div><h3>Design Automation</h3><p>Builds a professionally designed presentation.</p></div>", unsafe_allow_html=True)
+            for column, card_html in zip(st.columns(len(_FEATURE_CARDS)), _FEATURE_CARDS):
+                with column: st.markdown(card_html, unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
     st.sidebar.info("This is a Proof-of-Concept. All data is realistically simulated for demonstration.")
@@ -225,48 +408,20 @@ def login_page():
 
 
 # --- MAIN SCRIPT EXECUTION ---
-st.set_page_config(page_title="AI QBR Deck Generator", page_icon="✨", layout="wide")
+# `streamlit run` executes this file as __main__; importing it (e.g. to reuse the backend) renders nothing.
+if __name__ == "__main__":
+    st.set_page_config(page_title="AI QBR Deck Generator", page_icon="✨", layout="wide")
 
-# --- SHARED STYLES FOR BOTH PAGES ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-    body { font-family: 'Inter', sans-serif; }
-    .stApp { background: #f0f2f6; }
-    .main-container { padding: 2rem; }
-    .header { text-align: center; margin-bottom: 2rem; }
-    .header h1 {
-        font-size: 3rem; font-weight: 700; color: #0f203e;
-        background: -webkit-linear-gradient(45deg, #007bff, #0f203e);
-        -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-    }
-    .header p { font-size: 1.2rem; color: #555; }
-    .card {
-        background: white; border-radius: 15px; padding: 25px;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.07); transition: all 0.3s ease;
-    }
-    .card:hover { transform: translateY(-5px); box-shadow: 0 15px 30px rgba(0,0,0,0.1); }
-    .login-card { padding: 35px; }
-    .stButton>button {
-        background-image: linear-gradient(to right, #007bff 0%, #0056b3 100%);
-        color: white; border-radius: 10px; transition: 0.5s; background-size: 200% auto;
-        font-weight: 600; border: none; height: 3em; width: 100%;
-    }
-    .stButton>button:hover { background-position: right center; }
-    .stDownloadButton>button { background-image: linear-gradient(to right, #28a745, #218838); }
-    .feature-card { text-align: center; padding: 1.5rem; }
-    .feature-card h3 { color: #0f203e; font-weight: 600; }
-    .feature-card .icon { font-size: 3rem; margin-bottom: 1rem; color: #007bff; }
-</style>
-""", unsafe_allow_html=True)
-
-# --- CONDITIONAL PAGE RENDERING ---
-# Initialize session state for login
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-
-# Check login status and display the appropriate page
-if st.session_state.logged_in:
-    main_app()
-else:
-    login_page()
+    # --- SHARED STYLES FOR BOTH PAGES ---
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+    # --- CONDITIONAL PAGE RENDERING ---
+    # Initialize session state for login
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+
+    # Check login status and display the appropriate page
+    if st.session_state.logged_in:
+        main_app()
+    else:
+        login_page()